@@ -1,9 +1,10 @@
 import json
+import os
 import tempfile
 import unittest
 from pathlib import Path
 
-from tools.clipto_watcher import load_config, parse_clipboard_text
+from tools.clipto_watcher import RecentClipCache, load_config, parse_clipboard_text
 
 
 class ParseClipboardTextTests(unittest.TestCase):
@@ -37,6 +38,47 @@ class ParseClipboardTextTests(unittest.TestCase):
     def test_unknown_tag_ignored_when_configured(self) -> None:
         self.assertIsNone(parse_clipboard_text("rand: note", "ignore", self.tag_map))
 
+    def test_carriage_return_ends_the_line(self) -> None:
+        payload = parse_clipboard_text("todo: a\rmore private stuff", "map_to_misc", self.tag_map)
+        self.assertEqual(payload and payload["text"], "a")
+
+    def test_unicode_line_separator_ends_the_line(self) -> None:
+        payload = parse_clipboard_text(
+            "todo: a\u2028more private stuff", "map_to_misc", self.tag_map
+        )
+        self.assertEqual(payload and payload["text"], "a")
+
+    def test_vertical_tab_ends_the_line(self) -> None:
+        payload = parse_clipboard_text(
+            "todo: a\x0bmore private stuff", "map_to_misc", self.tag_map
+        )
+        self.assertEqual(payload and payload["text"], "a")
+
+    def test_overlong_line_is_rejected_not_truncated(self) -> None:
+        self.assertIsNone(parse_clipboard_text("todo: " + "x" * 9000, "map_to_misc", self.tag_map))
+
+
+class RecentClipCacheTests(unittest.TestCase):
+    def test_recorded_entry_is_seen_within_ttl(self) -> None:
+        cache = RecentClipCache()
+        self.assertFalse(cache.seen_recently("todo: a"))
+        cache.record("todo: a")
+        self.assertTrue(cache.seen_recently("todo: a"))
+        self.assertFalse(cache.seen_recently("todo: b"))
+
+    def test_unrecorded_entry_is_never_seen(self) -> None:
+        cache = RecentClipCache()
+        cache.seen_recently("todo: a")
+        self.assertFalse(cache.seen_recently("todo: a"))
+
+    def test_eviction_forgets_oldest_entry(self) -> None:
+        cache = RecentClipCache(max_entries=2)
+        cache.record("a")
+        cache.record("b")
+        cache.record("c")
+        self.assertFalse(cache.seen_recently("a"))
+        self.assertTrue(cache.seen_recently("c"))
+
 
 class LoadConfigTests(unittest.TestCase):
     def write_config(self, config: dict) -> Path:
@@ -58,6 +100,18 @@ class LoadConfigTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             load_config(config_path)
 
+    def test_load_config_reparses_when_file_changes(self) -> None:
+        config_path = self.write_config({"web_app_url": "https://script.google.com/macros/s/x/exec"})
+        first = load_config(config_path)
+        self.assertIs(load_config(config_path), first)
+
+        config_path.write_text(
+            json.dumps({"web_app_url": "https://script.google.com/macros/s/x/exec", "who": "LB"}),
+            encoding="utf-8",
+        )
+        os.utime(config_path, ns=(0, 0))  # Force a distinct mtime.
+        self.assertEqual(load_config(config_path)["who"], "LB")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -4,15 +4,23 @@
 from __future__ import annotations
 
 import argparse
-import json
-import re
+import asyncio
+import functools
+import logging
+import logging.handlers
+import os
+import queue as queue_mod
+import shutil
+import subprocess
 import sys
+import threading
 import time
-import urllib.error
-import urllib.request
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any
 
+import aiohttp
+import orjson
 import pyperclip
 
 
@@ -25,7 +33,48 @@ DEFAULT_TAG_MAP = {
 }
 
 DEFAULT_CONFIG_PATH = Path(__file__).resolve().parents[1] / "config.json"
-PREFIX_RE = re.compile(r"^([A-Za-z0-9]+):(.*)$")
+POST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+# Sent once per session; gzip negotiation keeps large error bodies small and
+# aiohttp decompresses transparently.
+SESSION_HEADERS = {
+    "User-Agent": f"clipto-watcher/{VERSION}",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# Gateway 5xx responses and failed connection attempts retry with exponential
+# backoff. Once the body may have reached the server (timeout, dropped
+# connection) the POST is never retried: doPost has no idempotency key, so a
+# retry could append the same entry twice.
+POST_ATTEMPTS = 3
+RETRY_BACKOFF = 0.25
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+# No real tag is longer than this; bounds the colon scan on each line.
+MAX_TAG_LEN = 32
+
+# No tagged entry line is this long; longer first lines are rejected whole,
+# never truncated, and the terminator scan stays bounded on huge pastes.
+MAX_LINE = 4096
+
+# How long the sender waits after the first queued payload so a burst of
+# pastes coalesces into one round trip.
+BATCH_DEBOUNCE = 0.25
+
+# Re-copying an already-sent paste within this window is skipped; the cache
+# holds at most DEDUPE_MAX digests.
+DEDUPE_TTL = 600.0
+DEDUPE_MAX = 128
+
+# Fallback-poll backoff: after this many unchanged polls the sleep grows by
+# 1.5x per tick, capped at the ceiling; any change snaps back to poll_interval.
+IDLE_POLLS_BEFORE_BACKOFF = 20
+IDLE_BACKOFF_FACTOR = 1.5
+MAX_POLL_INTERVAL = 5.0
+
+_VALID_UNKNOWN_BEHAVIORS = frozenset({"map_to_misc", "ignore"})
+
+logger = logging.getLogger("clipto")
 
 
 def parse_args() -> argparse.Namespace:
@@ -46,6 +95,28 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def _setup_logging() -> logging.handlers.QueueListener:
+    """Route hot-path records through a queue so emitting never blocks on stderr."""
+    log_queue: queue_mod.SimpleQueue = queue_mod.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(message)s"))
+    return logging.handlers.QueueListener(log_queue, stream)
+
+
+def _json_dumps(obj: Any) -> str:
+    # aiohttp wants str back from json_serialize; orjson does the heavy
+    # lifting in C and skips stdlib json's per-field overhead.
+    return orjson.dumps(obj).decode("utf-8")
+
+
+def _get_str(cfg: dict[str, Any], key: str, default: str = "") -> str:
+    return str(cfg.get(key, default)).strip()
+
+
 def load_config(config_path: Path) -> dict[str, Any]:
     if not config_path.exists():
         raise FileNotFoundError(
@@ -53,17 +124,27 @@ def load_config(config_path: Path) -> dict[str, Any]:
             "Copy config.example.json to config.json and update values."
         )
 
-    with config_path.open("r", encoding="utf-8") as f:
-        cfg = json.load(f)
+    # Key the cache on mtime so a no-op reload reuses the parsed config and an
+    # edited file is reparsed.
+    return _load_config_cached(str(config_path), config_path.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(path_str: str, mtime_ns: int) -> dict[str, Any]:
+    del mtime_ns  # Only part of the cache key.
+
+    # orjson decodes the UTF-8 bytes directly; no TextIOWrapper or
+    # incremental-decoder stack for a file this small.
+    cfg = orjson.loads(Path(path_str).read_bytes())
 
-    web_app_url = str(cfg.get("web_app_url", "")).strip()
+    web_app_url = _get_str(cfg, "web_app_url")
     if not web_app_url:
         raise ValueError("config.json is missing required field: web_app_url")
 
-    who = str(cfg.get("who", "ME")).strip() or "ME"
+    who = _get_str(cfg, "who", "ME") or "ME"
     poll_interval = float(cfg.get("poll_interval", 0.5))
-    unknown_behavior = str(cfg.get("unknown_prefix_behavior", "map_to_misc")).strip().lower()
-    if unknown_behavior not in {"map_to_misc", "ignore"}:
+    unknown_behavior = _get_str(cfg, "unknown_prefix_behavior", "map_to_misc").lower()
+    if unknown_behavior not in _VALID_UNKNOWN_BEHAVIORS:
         raise ValueError("unknown_prefix_behavior must be 'map_to_misc' or 'ignore'")
 
     tag_map_cfg = cfg.get("tag_map", {})
@@ -73,9 +154,17 @@ def load_config(config_path: Path) -> dict[str, Any]:
             key_norm = str(key).strip().lower()
             if key_norm:
                 tag_map[key_norm] = str(value)
+    # Canonicalize once at load: interned keys make the per-paste lookup a
+    # pointer compare, and stripped values (empties dropped) mean the hot
+    # path can trust whatever it gets back.
+    tag_map = {
+        sys.intern(key): section
+        for key, value in tag_map.items()
+        if (section := str(value).strip())
+    }
 
     return {
-        "google_doc_url": str(cfg.get("google_doc_url", "")).strip(),
+        "google_doc_url": _get_str(cfg, "google_doc_url"),
         "web_app_url": web_app_url,
         "who": who,
         "poll_interval": poll_interval,
@@ -90,66 +179,378 @@ def parse_clipboard_text(
     if raw_text is None:
         return None
 
-    # First non-empty line only.
+    # First non-empty line only, found without materializing every line.
+    # Both \r and \n end a line (as splitlines() did), and each terminator
+    # search is windowed so a multi-megabyte single-line paste costs O(1).
     line = ""
-    for candidate in raw_text.splitlines():
-        if candidate.strip():
-            line = candidate.strip()
+    start = 0
+    length = len(raw_text)
+    while start < length:
+        window = start + MAX_LINE + 1
+        nl = raw_text.find("\n", start, window)
+        cr = raw_text.find("\r", start, window)
+        if nl == -1:
+            end = cr
+        elif cr == -1:
+            end = nl
+        else:
+            end = min(nl, cr)
+        if end == -1:
+            if length - start > MAX_LINE:
+                # A line this long cannot be a tagged entry; drop the paste
+                # rather than posting a truncated version of it.
+                return None
+            end = length
+        candidate = raw_text[start:end].strip()
+        if candidate:
+            # \n and \r end the windowed scan above; splitlines() on the
+            # bounded candidate also honors the exotic terminators (\x0b,
+            # \x0c, \x1c-\x1e, \x85, \u2028, \u2029) so nothing past the
+            # first line leaks into the posted text.
+            line = candidate.splitlines()[0].strip()
             break
+        start = end + 2 if raw_text.startswith("\r\n", end) else end + 1
     if not line:
         return None
 
-    match = PREFIX_RE.match(line)
-    if not match:
+    # Tags are short alphanumeric words; scan for the colon directly instead
+    # of paying regex-engine and match-object overhead per clipboard change.
+    colon = line.find(":", 0, MAX_TAG_LEN + 1)
+    if colon <= 0:
+        return None
+
+    prefix_raw = line[:colon]
+    if not (prefix_raw.isascii() and prefix_raw.isalnum()):
         return None
 
-    prefix_raw = match.group(1)
-    text = match.group(2).strip()
+    text = line[colon + 1 :].strip()
     if not text:
         return None
 
-    prefix = prefix_raw.lower()
-    if prefix not in tag_map:
-        if unknown_behavior == "map_to_misc":
-            prefix = "misc"
-        else:
+    prefix = sys.intern(prefix_raw.lower())
+    section = tag_map.get(prefix)
+    if section is None:
+        if unknown_behavior != "map_to_misc":
+            return None
+        prefix = "misc"
+        section = tag_map.get(prefix)
+        if section is None:
             return None
-
-    section = str(tag_map.get(prefix, "")).strip()
-    if not section:
-        return None
 
     return {"type": prefix, "section": section, "text": text}
 
 
-def post_payload(web_app_url: str, payload: dict[str, str]) -> bool:
-    body = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        web_app_url,
-        data=body,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
+def _clip_digest(text: str | None) -> tuple[int, int]:
+    """Cheap (length, hash) fingerprint so idle polls never re-compare full text."""
+    if text is None:
+        return (-1, 0)
+    return (len(text), hash(text))
+
+
+class RecentClipCache:
+    """Bounded LRU of delivered clipboard digests so alternating copies
+    (A, B, A, B) do not re-post entries already sent within the TTL.
+
+    Only confirmed deliveries are recorded: a paste whose POST failed stays
+    out of the cache, so copying the same line again retries it. The watcher
+    thread reads and the sender writes; each side performs single GIL-atomic
+    dict operations, so no lock is needed.
+    """
+
+    def __init__(self, max_entries: int = DEDUPE_MAX, ttl: float = DEDUPE_TTL) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[int, int], float] = OrderedDict()
+
+    def seen_recently(self, text: str) -> bool:
+        """Report whether text was successfully sent within the TTL."""
+        last = self._entries.get(_clip_digest(text))
+        return last is not None and (time.monotonic() - last) <= self.ttl
+
+    def record(self, text: str) -> None:
+        """Mark text as delivered now."""
+        key = _clip_digest(text)
+        self._entries[key] = time.monotonic()
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class ClipboardWatcher:
+    """Wait for clipboard changes without shelling out on every poll tick.
+
+    Backends, in order of preference:
+
+    - macOS: read ``NSPasteboard.changeCount()`` (a cheap in-process counter)
+      and only invoke ``pyperclip.paste()`` when it increments, avoiding the
+      ``pbpaste`` subprocess between copies.
+    - Wayland: block on a ``wl-paste --watch`` child process that emits one
+      line per clipboard change, so the watcher sleeps until a real change.
+    - fallback: the original fixed-interval pyperclip value-compare poll,
+      governed by ``poll_interval``.
+    """
+
+    def __init__(self, poll_interval: float) -> None:
+        self.poll_interval = poll_interval
+        self.backend = "poll"
+        self._pasteboard = None
+        self._change_count = -1
+        self._watch_proc: subprocess.Popen | None = None
+        self._idle_polls = 0
+        self._idle_sleep = poll_interval
+        self._init_backend()
+
+        # Prime baseline clipboard state so startup content is not posted.
+        try:
+            baseline: str | None = pyperclip.paste()
+        except Exception:
+            baseline = None
+        self._last_digest = _clip_digest(baseline)
+
+    def _init_backend(self) -> None:
+        if sys.platform == "darwin":
+            try:
+                from AppKit import NSPasteboard  # noqa: PLC0415
+
+                self._pasteboard = NSPasteboard.generalPasteboard()
+                self._change_count = int(self._pasteboard.changeCount())
+                self.backend = "nspasteboard"
+                return
+            except Exception:  # noqa: BLE001 - pyobjc missing; fall back to polling
+                self._pasteboard = None
+
+        if os.environ.get("WAYLAND_DISPLAY") and shutil.which("wl-paste"):
+            try:
+                self._watch_proc = subprocess.Popen(
+                    ["wl-paste", "--watch", "echo"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+                self.backend = "wl-paste"
+            except Exception:  # noqa: BLE001
+                self._watch_proc = None
+
+    def wait_for_change(self) -> str:
+        """Block until the clipboard text changes, then return the new text."""
+        while True:
+            if self.backend == "nspasteboard":
+                count = int(self._pasteboard.changeCount())
+                if count == self._change_count:
+                    time.sleep(self.poll_interval)
+                    continue
+                self._change_count = count
+            elif self.backend == "wl-paste":
+                line = self._watch_proc.stdout.readline()
+                if not line:
+                    # Watcher child exited; degrade to plain polling.
+                    self._watch_proc = None
+                    self.backend = "poll"
+                    continue
 
-    try:
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            status = getattr(resp, "status", resp.getcode())
-            text = resp.read().decode("utf-8", errors="replace").strip()
-            if 200 <= status < 300 and text == "OK":
-                return True
-            print(f"[error] server response status={status} body={text}")
+            current = pyperclip.paste()
+            digest = _clip_digest(current)
+            if digest == self._last_digest:
+                if self.backend == "poll":
+                    time.sleep(self._idle_sleep)
+                    self._idle_polls += 1
+                    if self._idle_polls >= IDLE_POLLS_BEFORE_BACKOFF:
+                        self._idle_sleep = min(
+                            self._idle_sleep * IDLE_BACKOFF_FACTOR, MAX_POLL_INTERVAL
+                        )
+                continue
+
+            self._idle_polls = 0
+            self._idle_sleep = self.poll_interval
+            self._last_digest = digest
+            return current
+
+
+async def post_payload(
+    session: aiohttp.ClientSession, web_app_url: str, payload: dict[str, str]
+) -> bool:
+    for attempt in range(1, POST_ATTEMPTS + 1):
+        if attempt > 1:
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 2))
+        try:
+            async with session.post(web_app_url, json=payload) as resp:
+                text = (await resp.text()).strip()
+                if 200 <= resp.status < 300 and text == "OK":
+                    return True
+                if resp.status in RETRY_STATUSES:
+                    logger.error(
+                        "[error] transient server error status=%s (attempt %d/%d)",
+                        resp.status,
+                        attempt,
+                        POST_ATTEMPTS,
+                    )
+                    continue
+                logger.error("[error] server response status=%s body=%s", resp.status, text)
+                return False
+        except aiohttp.ClientConnectorError as exc:
+            # The connection never opened, so nothing reached the server and
+            # a retry cannot duplicate the entry.
+            logger.error(
+                "[error] connection failed: %s (attempt %d/%d)", exc, attempt, POST_ATTEMPTS
+            )
+        except asyncio.TimeoutError:
+            # The append may have landed before the deadline; retrying could
+            # post the same entry twice, so give up instead.
+            logger.error("[error] request timed out")
+            return False
+        except aiohttp.ClientError as exc:
+            logger.error("[error] request failed: %s", exc)
+            return False
+        except Exception as exc:  # noqa: BLE001
+            logger.error("[error] unexpected failure: %s", exc)
             return False
-    except urllib.error.HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace")
-        print(f"[error] HTTP {exc.code}: {detail}")
-    except urllib.error.URLError as exc:
-        print(f"[error] network issue: {exc}")
-    except Exception as exc:  # noqa: BLE001
-        print(f"[error] unexpected failure: {exc}")
 
     return False
 
 
+def watch_clipboard(
+    watcher: ClipboardWatcher,
+    config: dict[str, Any],
+    queue: asyncio.Queue,
+    loop: asyncio.AbstractEventLoop,
+    recent: RecentClipCache,
+) -> None:
+    """Feed parsed clipboard payloads into the send queue as they appear.
+
+    Runs in its own daemon thread rather than the event loop's executor:
+    wait_for_change can block indefinitely, a cancelled task cannot interrupt
+    an executor future, and a daemon thread never holds up interpreter exit,
+    so Ctrl+C stops the process promptly.
+    """
+    while True:
+        try:
+            current = watcher.wait_for_change()
+        except Exception as exc:  # noqa: BLE001
+            logger.error("[error] clipboard read failed: %s", exc)
+            time.sleep(config["poll_interval"])
+            continue
+
+        parsed = parse_clipboard_text(
+            raw_text=current,
+            unknown_behavior=config["unknown_prefix_behavior"],
+            tag_map=config["tag_map"],
+        )
+        if parsed:
+            if recent.seen_recently(current):
+                continue
+            payload = {
+                "type": parsed["type"],
+                "section": parsed["section"],
+                "text": parsed["text"],
+                "who": config["who"],
+            }
+            try:
+                # The raw text rides along so the sender can record the
+                # delivery digest only once the POST succeeds.
+                loop.call_soon_threadsafe(queue.put_nowait, (payload, current))
+            except RuntimeError:
+                # Event loop closed; the process is shutting down.
+                return
+
+
+async def post_batch(
+    session: aiohttp.ClientSession, web_app_url: str, batch: list[dict[str, str]]
+) -> tuple[list[bool], bool]:
+    """Send a burst as one {"items": [...]} POST, per item if the server declines.
+
+    Returns per-item delivery flags plus whether the server accepted the
+    combined payload. A web app deployment that predates batch support
+    answers with an error body; each item is then re-sent individually over
+    the same keep-alive connection and the flag comes back False so the
+    caller stops probing with batches for the rest of the run. Transport
+    failures leave batch support undecided; the per-item fallback only runs
+    when the batch provably never reached the server, since re-sending an
+    appended burst would duplicate every entry in it.
+    """
+    supported = True
+    try:
+        async with session.post(web_app_url, json={"items": batch}) as resp:
+            text = (await resp.text()).strip()
+            if 200 <= resp.status < 300:
+                if text == "OK":
+                    for payload in batch:
+                        logger.info("[sent] %s: %s", payload["type"], payload["text"])
+                    return [True] * len(batch), True
+                supported = False
+                logger.info("[info] web app declined batched items; sending individually")
+    except aiohttp.ClientConnectorError as exc:
+        # The connection never opened; nothing reached the server, so the
+        # per-item fallback below is safe.
+        logger.error("[error] connection failed: %s", exc)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+        # The batch may have been appended before the failure; report the
+        # burst undelivered rather than risk posting every entry twice. The
+        # items stay out of the dedupe cache, so re-copying retries them.
+        logger.error("[error] batch request failed: %s", exc)
+        return [False] * len(batch), supported
+
+    results = []
+    for payload in batch:
+        ok = await post_payload(session, web_app_url, payload)
+        if ok:
+            logger.info("[sent] %s: %s", payload["type"], payload["text"])
+        results.append(ok)
+    return results, supported
+
+
+async def send_payloads(
+    config: dict[str, Any], queue: asyncio.Queue, recent: RecentClipCache
+) -> None:
+    """Drain the queue so slow posts never block clipboard detection."""
+    connector = aiohttp.TCPConnector(limit=4)
+    async with aiohttp.ClientSession(
+        timeout=POST_TIMEOUT,
+        connector=connector,
+        headers=SESSION_HEADERS,
+        json_serialize=_json_dumps,
+    ) as session:
+        batch_supported = True
+        while True:
+            first = await queue.get()
+            await asyncio.sleep(BATCH_DEBOUNCE)
+            items = [first]
+            while not queue.empty():
+                items.append(queue.get_nowait())
+
+            payloads = [payload for payload, _ in items]
+            if len(items) > 1 and batch_supported:
+                results, batch_supported = await post_batch(
+                    session, config["web_app_url"], payloads
+                )
+            else:
+                results = []
+                for payload in payloads:
+                    ok = await post_payload(session, config["web_app_url"], payload)
+                    if ok:
+                        logger.info("[sent] %s: %s", payload["type"], payload["text"])
+                    results.append(ok)
+
+            for (_, raw_text), ok in zip(items, results):
+                if ok:
+                    recent.record(raw_text)
+                queue.task_done()
+
+
+async def run_watcher(config: dict[str, Any]) -> None:
+    watcher = ClipboardWatcher(poll_interval=config["poll_interval"])
+    print(f"[info] clipboard backend: {watcher.backend}")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    recent = RecentClipCache()
+    thread = threading.Thread(
+        target=watch_clipboard,
+        args=(watcher, config, queue, asyncio.get_running_loop(), recent),
+        name="clipboard-watcher",
+        daemon=True,
+    )
+    thread.start()
+    await send_payloads(config, queue, recent)
+
+
 def main() -> int:
     args = parse_args()
 
@@ -163,39 +564,15 @@ def main() -> int:
     if config["google_doc_url"]:
         print(f"[info] target doc: {config['google_doc_url']}")
 
-    # Prime baseline clipboard state so startup content is not posted.
+    listener = _setup_logging()
+    listener.start()
     try:
-        last_clipboard = pyperclip.paste()
-    except Exception:
-        last_clipboard = None
-
-    while True:
-        try:
-            current = pyperclip.paste()
-        except Exception as exc:  # noqa: BLE001
-            print(f"[error] clipboard read failed: {exc}")
-            time.sleep(config["poll_interval"])
-            continue
-
-        if current != last_clipboard:
-            last_clipboard = current
-            parsed = parse_clipboard_text(
-                raw_text=current,
-                unknown_behavior=config["unknown_prefix_behavior"],
-                tag_map=config["tag_map"],
-            )
-            if parsed:
-                payload = {
-                    "type": parsed["type"],
-                    "section": parsed["section"],
-                    "text": parsed["text"],
-                    "who": config["who"],
-                }
-                ok = post_payload(config["web_app_url"], payload)
-                if ok:
-                    print(f"[sent] {payload['type']}: {payload['text']}")
-
-        time.sleep(config["poll_interval"])
+        asyncio.run(run_watcher(config))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.stop()
+    return 0
 
 
 if __name__ == "__main__":